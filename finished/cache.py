@@ -0,0 +1,210 @@
+import contextlib
+import fcntl
+import hashlib
+import json
+import os
+import shutil
+import sys
+import tempfile
+
+DIRECTORY = "./out/cache"
+LIMIT = 64 << 20
+INDEX = "index.json"
+LOCK = ".lock"
+
+def artifact_key(name,params,source):
+  """ Content address of an artifact
+
+  args:
+    name (str) : task name
+    params (dict) : parameters the artifact depends on
+    source (str) : path of the task source file
+  return:
+    key (str) : hex digest over name, params and source contents
+  """
+  with open(source,"rb") as stream:
+    source_digest = hashlib.sha256(stream.read()).hexdigest()
+  description = json.dumps([name,params,source_digest],sort_keys=True)
+  return hashlib.sha256(description.encode()).hexdigest()
+
+def cache_directory():
+  """ Location of the cache, $ROSETTA_CACHE if set else DIRECTORY
+
+  return:
+    directory (str)
+  """
+  return os.environ.get("ROSETTA_CACHE",DIRECTORY)
+
+def read_index(directory=DIRECTORY):
+  """ Usage order of the artifacts in the cache
+
+  Recency is kept as a counter rather than taken from file times, 
+  which can tie on filesystems with coarse timestamps.
+
+  kwargs:
+    directory (str) : location of the cache
+  return:
+    index (dict) : "counter" last handed out, "entries" mapping each 
+      artifact file name to the counter of its last use
+  """
+  try:
+    with open(os.path.join(directory,INDEX)) as stream:
+      return json.load(stream)
+  except (OSError,ValueError):
+    return {"counter":0,"entries":{}}
+
+def write_index(index,directory=DIRECTORY):
+  """ Replace the usage order of the artifacts in the cache
+
+  args:
+    index (dict) : see read_index()
+  kwargs:
+    directory (str) : location of the cache
+  """
+  def write(temporary):
+    with open(temporary,"w") as stream:
+      json.dump(index,stream)
+  write_atomic(directory,os.path.join(directory,INDEX),write)
+
+def write_atomic(directory,path,write):
+  """ Write a file through a temporary file in the same directory
+
+  Readers see either the old file or the complete new one, never a 
+  partial write.
+
+  args:
+    directory (str) : location of the temporary file
+    path (str) : final path of the file
+    write (callable) : fills the temporary file, given its path
+  """
+  descriptor,temporary = tempfile.mkstemp(dir=directory,prefix=".")
+  os.close(descriptor)
+  try:
+    write(temporary)
+    os.replace(temporary,path)
+  except BaseException:
+    os.remove(temporary)
+    raise
+
+@contextlib.contextmanager
+def locked(directory=DIRECTORY):
+  """ Hold the cache lock, serializing index updates and evictions
+  between processes sharing the cache
+
+  kwargs:
+    directory (str) : location of the cache
+  """
+  with open(os.path.join(directory,LOCK),"a") as stream:
+    fcntl.flock(stream.fileno(),fcntl.LOCK_EX)
+    try:
+      yield
+    finally:
+      fcntl.flock(stream.fileno(),fcntl.LOCK_UN)
+
+def touch(name,directory=DIRECTORY):
+  """ Mark an artifact as the most recently used
+
+  args:
+    name (str) : artifact file name
+  kwargs:
+    directory (str) : location of the cache
+  """
+  with locked(directory):
+    index = read_index(directory)
+    index["counter"] += 1
+    index["entries"][name] = index["counter"]
+    write_index(index,directory)
+
+def evict(limit=LIMIT,directory=DIRECTORY):
+  """ Remove least recently used artifacts until under the size limit
+
+  args:
+    limit (int) : largest total size in bytes
+    directory (str) : location of the cache
+  return:
+    removed [str...] : paths of the removed artifacts
+  """
+  with locked(directory):
+    index = read_index(directory)
+    entries = []
+    for entry in os.scandir(directory):
+      # Skip the index, the lock and temporary files of writes in progress
+      if entry.is_file() and not entry.name.startswith(".") and entry.name != INDEX:
+        try:
+          stat = entry.stat()
+        except FileNotFoundError:
+          continue
+        entries.append((index["entries"].get(entry.name,0),stat.st_mtime,stat.st_size,entry.path))
+    entries.sort()
+    total = sum(size for _,_,size,_ in entries)
+    removed = []
+    for _,_,size,path in entries:
+      if total <= limit:
+        break
+      try:
+        os.remove(path)
+      except FileNotFoundError:
+        pass
+      removed.append(path)
+      total -= size
+    if removed:
+      # Drop removed artifacts from the index
+      for path in removed:
+        index["entries"].pop(os.path.basename(path),None)
+      write_index(index,directory)
+  return removed
+
+def fetch(name,params,source,output,render,limit=LIMIT,directory=None):
+  """ Reuse a cached artifact, or render and cache it
+
+  A hit copies the stored artifact to output and marks it as recently
+  used. A miss calls render, stores a copy of output and evicts old
+  artifacts past the size limit. Artifacts are stored atomically, so 
+  an interrupted or concurrent store never leaves a partial artifact,
+  and an artifact evicted by another process mid hit counts as a miss.
+
+  args:
+    name (str) : task name
+    params (dict) : parameters the artifact depends on
+    source (str) : path of the task source file
+    output (str) : path the artifact is written to
+    render (callable) : writes the artifact to output, given no args
+  kwargs:
+    limit (int) : largest total size in bytes
+    directory (str|None) : location of the cache, cache_directory() if None
+  return:
+    hit (bool) : whether the artifact came from the cache
+  """
+  directory = directory or cache_directory()
+  key = artifact_key(name,params,source)
+  filename = key + os.path.splitext(output)[1]
+  cached = os.path.join(directory,filename)
+  try:
+    shutil.copyfile(cached,output)
+  except FileNotFoundError:
+    pass
+  else:
+    touch(filename,directory)
+    return True
+  render()
+  os.makedirs(directory,exist_ok=True)
+  write_atomic(directory,cached,lambda temporary: shutil.copyfile(output,temporary))
+  touch(filename,directory)
+  evict(limit,directory)
+  return False
+
+def task(argv):
+  """ Report the size of the artifact cache, --clear empties it """
+  directory = cache_directory()
+  if not os.path.isdir(directory):
+    print("Cache is empty")
+    return 0
+  if "--clear" in argv:
+    evict(0,directory)
+  entries = [entry.stat().st_size for entry in os.scandir(directory)
+    if not entry.name.startswith(".") and entry.name != INDEX]
+  print("{} artifacts, {} bytes".format(len(entries),sum(entries)))
+  return 0
+
+if __name__ == "__main__":
+  sys.exit(task(sys.argv))
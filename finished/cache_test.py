@@ -0,0 +1,95 @@
+import tasks.cache
+
+import unittest
+import logging
+import multiprocessing
+import os
+import random
+import shutil
+
+def fetch_many(directory,seed):
+  """ Fetch random artifacts into a shared cache, run in a child process """
+  output = "./out/cache_test_{}.bin".format(seed)
+  def render():
+    with open(output,"wb") as stream:
+      stream.write(b"x"*16)
+  for depth in random.Random(seed).choices(range(8),k=60):
+    tasks.cache.fetch("test",{"depth":depth},tasks.cache.__file__,output,
+      render,limit=48,directory=directory)
+
+class TestCache(unittest.TestCase):
+  def setUp(self):
+    """ Test Case Enviroment """
+    logging.basicConfig(filename="./logs/cache_test.log",level=logging.DEBUG)
+    logging.info('TestCache initialized')
+    self.directory = "./out/cache_test"
+    shutil.rmtree(self.directory,ignore_errors=True)
+    self.renders = 0
+  def render(self,output,size=16):
+    """ Stand-in for a task drawing its artifact """
+    def render():
+      self.renders += 1
+      with open(output,"wb") as stream:
+        stream.write(b"x"*size)
+    return render
+  def test_hit(self):
+    """ Identical parameters render only once """
+    logging.info("test_hit()")
+    output = "./out/cache_test.bin"
+    hits = [tasks.cache.fetch("test",{"depth":3},tasks.cache.__file__,output,
+      self.render(output),directory=self.directory) for _ in range(3)]
+    logging.info("Hits: {}".format(hits))
+    self.assertListEqual(hits,[False,True,True])
+    self.assertEqual(self.renders,1)
+  def test_key(self):
+    """ Different parameters are different artifacts """
+    logging.info("test_key()")
+    key_a = tasks.cache.artifact_key("test",{"depth":3},tasks.cache.__file__)
+    key_b = tasks.cache.artifact_key("test",{"depth":4},tasks.cache.__file__)
+    self.assertNotEqual(key_a,key_b)
+  def fetch(self,depth):
+    """ Fetch a 16 byte artifact into a cache holding at most 3 """
+    output = "./out/cache_test.bin"
+    return tasks.cache.fetch("test",{"depth":depth},tasks.cache.__file__,output,
+      self.render(output),limit=48,directory=self.directory)
+  def test_evict(self):
+    """ Least recently used artifacts are removed past the size limit """
+    logging.info("test_evict()")
+    for depth in range(3):
+      self.fetch(depth)
+    # Tie every modification time, order must come from the index
+    for name in os.listdir(self.directory):
+      os.utime(os.path.join(self.directory,name),(0,0))
+    self.assertTrue(self.fetch(0))
+    self.assertFalse(self.fetch(3))
+    artifacts = [name for name in os.listdir(self.directory)
+      if not name.startswith(".") and name != tasks.cache.INDEX]
+    self.assertEqual(len(artifacts),3)
+    self.assertListEqual([self.fetch(depth) for depth in (0,2,3,1)],[True,True,True,False])
+  def test_concurrent(self):
+    """ Processes sharing a cache never fail on each other's evictions """
+    logging.info("test_concurrent()")
+    context = multiprocessing.get_context("fork")
+    processes = [context.Process(target=fetch_many,args=(self.directory,seed)) for seed in range(8)]
+    for process in processes:
+      process.start()
+    for process in processes:
+      process.join()
+    logging.info("Exit Codes: {}".format([process.exitcode for process in processes]))
+    self.assertListEqual([process.exitcode for process in processes],[0]*8)
+    index = tasks.cache.read_index(self.directory)
+    self.assertEqual(index["counter"],8*60)
+  def test_write_atomic(self):
+    """ An interrupted write leaves neither a partial nor temporary file """
+    logging.info("test_write_atomic()")
+    os.makedirs(self.directory)
+    path = os.path.join(self.directory,"artifact.bin")
+    def write(temporary):
+      with open(temporary,"wb") as stream:
+        stream.write(b"partial")
+      raise KeyboardInterrupt
+    self.assertRaises(KeyboardInterrupt,tasks.cache.write_atomic,self.directory,path,write)
+    self.assertListEqual(os.listdir(self.directory),[])
+
+if __name__ == '__main__':
+  unittest.main()
@@ -1,9 +1,12 @@
 from PIL import Image, ImageDraw, ImageColor
 
+import argparse
 import math
 import random
 import sys
 
+import tasks.cache
+
 def random_point_triangle(p0,p1,p2):
   """ Uniformally Picks a point in a triangle 
   
@@ -37,32 +40,105 @@ def chaos_game(reference_point,starting_point,timeout=10000):
   return:
     generated_points [(float,float)...] : absolute positions
   """
+  return list(iter_chaos_game(reference_point,starting_point,timeout))
+
+def iter_chaos_game(reference_point,starting_point,timeout=10000):
+  """ Lazily generates points with a chaotic procedure
+  
+  args:
+    reference_point [(float,float)...] : absolute positions
+    starting_point  (float,float) : absolute positions
+  kwargs:
+    timeout (int) : iteration count for procedure
+  yield:
+    generated_point (float,float) : absolute position
+  """
   xi,yi = starting_point
-  generated_points = [starting_point]
+  yield starting_point
   for _ in range(timeout):
     # Pick Reference Point and compute midpoint with Current Point
     xj,yj = random.choice(reference_point)
     xi,yi = (xi+xj)/2,(yi+yj)/2
-    generated_points.append((xi,yi))
-  return generated_points
+    yield (xi,yi)
+
+def write_svg(filename,points,reference_point,width,height,precision=0):
+  """ Stream points of the Chaos Game to a SVG file
+  
+  All points are merged into a single path of unit squares, each one 
+  placed with a relative move from the last. Coordinates are rounded 
+  to a fixed number of decimals before the moves are taken, so rounding
+  error does not accumulate along the path.
+  
+  args:
+    filename (str) : path of the SVG file
+    points iter((float,float)...) : absolute positions
+    reference_point [(float,float)...] : vertices of the boundary
+    width,height (int) : size of the canvas
+  kwargs:
+    precision (int) : decimals kept for each coordinate
+  """
+  scale = 10**precision
+  def number(q):
+    return str(q) if precision == 0 else "{:.{}f}".format(q/scale,precision)
+  
+  with open(filename,"w",buffering=1<<16) as out:
+    out.write('<svg xmlns="http://www.w3.org/2000/svg" width="{0}" height="{1}" '
+      'viewBox="0 0 {0} {1}">\n'.format(width,height))
+    out.write('<rect width="100%" height="100%" fill="#FFFFFF"/>\n')
+    out.write('<path fill="#FF0000" d="')
+    xl,yl = 0,0
+    for x,y in points:
+      xq,yq = round(x*scale),round(y*scale)
+      out.write("m{} {}h1v1h-1z".format(number(xq-xl),number(yq-yl)))
+      xl,yl = xq,yq
+    out.write('"/>\n<polygon fill="none" stroke="#000000" points="')
+    out.write(" ".join("{},{}".format(x,y) for x,y in reference_point))
+    out.write('"/>\n</svg>\n')
 
 def task(argv):
-  """ Task Description """
-  # Initialize Canvas
-  img = Image.new("RGBA",(800,600),ImageColor.getrgb("#FFFFFF"))
-  draw = ImageDraw.Draw(img)
+  """ Play the Chaos Game in an Equilateral Triangle 
   
-  # Playing Chaos Game in an Equilateral Triangle
+  Options change the number of points and the random seed, --svg 
+  streams the points to ./out/chaos.svg instead. Seeded artifacts are
+  reused from the cache unless --no-cache is passed; unseeded runs are 
+  never cached since their output is meant to differ.
+  """
+  parser = argparse.ArgumentParser(prog="chaos")
+  parser.add_argument("--points",type=int,default=10000)
+  parser.add_argument("--seed",type=int)
+  parser.add_argument("--svg",action="store_true")
+  parser.add_argument("--no-cache",action="store_true")
+  args = parser.parse_args(argv[1:])
   reference_points = [(100,550),(700,550),(400,550-300*math.sqrt(3))]
-  starting_point = random_point_triangle(*reference_points)
-  generated_points = chaos_game(reference_points,starting_point)
   
-  # Draw Generated Points and Boundary Lines
-  draw.point(generated_points,fill=ImageColor.getrgb("#FF0000"))
-  draw.polygon(reference_points,outline=ImageColor.getrgb("#000000"))
+  def render_svg():
+    random.seed(args.seed)
+    starting_point = random_point_triangle(*reference_points)
+    points = iter_chaos_game(reference_points,starting_point,args.points)
+    write_svg("./out/chaos.svg",points,reference_points,800,600)
+  def render_png():
+    # Initialize Canvas
+    img = Image.new("RGBA",(800,600),ImageColor.getrgb("#FFFFFF"))
+    draw = ImageDraw.Draw(img)
+  
+    # Playing Chaos Game in an Equilateral Triangle
+    random.seed(args.seed)
+    starting_point = random_point_triangle(*reference_points)
+    generated_points = chaos_game(reference_points,starting_point,args.points)
+  
+    # Draw Generated Points and Boundary Lines
+    draw.point(generated_points,fill=ImageColor.getrgb("#FF0000"))
+    draw.polygon(reference_points,outline=ImageColor.getrgb("#000000"))
 
-  # Commit Canvas
-  img.save("./out/chaos.png","PNG")
+    # Commit Canvas
+    img.save("./out/chaos.png","PNG")
+  
+  output,render = ("./out/chaos.svg",render_svg) if args.svg else ("./out/chaos.png",render_png)
+  if args.no_cache or args.seed is None:
+    render()
+  else:
+    params = {"points":args.points,"seed":args.seed}
+    tasks.cache.fetch("chaos",params,__file__,output,render)
   return 0
   
 if __name__ == "__main__":
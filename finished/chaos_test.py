@@ -2,6 +2,7 @@ import tasks.chaos
 
 import unittest
 import logging
+import xml.etree.ElementTree
 
 class TestChaos(unittest.TestCase):
   def setUp(self):
@@ -27,5 +28,16 @@ class TestChaos(unittest.TestCase):
     *_,last_point = generated_points
     xl,yl = last_point
     self.assertAlmostEqual(2.0,xl)
+  def test_write_svg(self):
+    """ Testing if streamed SVG holds one square per generated point """
+    logging.info("test_write_svg()")
+    reference_points = [(0.0,0.0),(8.0,0.0),(4.0,8.0)]
+    points = tasks.chaos.iter_chaos_game(reference_points,(4.0,4.0),timeout=50)
+    tasks.chaos.write_svg("./out/chaos_test.svg",points,reference_points,8,8)
+    svg = xml.etree.ElementTree.parse("./out/chaos_test.svg").getroot()
+    path = svg.find("{http://www.w3.org/2000/svg}path").get("d")
+    logging.info("Path Written: {}".format(path))
+    self.assertEqual(path.count("m"),51)
+    self.assertTrue(path.startswith("m4 4h1v1h-1z"))
 if __name__ == '__main__':
   unittest.main()
@@ -1,6 +1,25 @@
 from PIL import Image, ImageDraw
+
+import argparse
 import sys
 
+import tasks.cache
+
+def branch_points(p1,p2):
+  """ Construct the remaining vertices of a Square and Right Triangle
+  
+  args:
+    p1,p2 (float,float) : absolute position on base vertices
+  return:
+    p3,p4 (float,float) : absolute position on top vertices of square
+    p5 (float,float) : absolute position on apex of right triangle
+  """
+  pd = (p2[0] - p1[0]),(p1[1] - p2[1]) 
+  p3 = (p2[0] - pd[1]),(p2[1] - pd[0])
+  p4 = (p1[0] - pd[1]),(p1[1] - pd[0])
+  p5 = (p4[0] + (pd[0] - pd[1])/2),(p4[1] - (pd[0] + pd[1])/2)
+  return p3,p4,p5
+
 def gather_squares_triangles(p1,p2,depth):
   """ Draw Square and Right Triangle given 2 points, 
   Recurse on new points
@@ -19,10 +38,7 @@ def gather_squares_triangles(p1,p2,depth):
     return [],[]
   
   # Generate Points 
-  pd = (p2[0] - p1[0]),(p1[1] - p2[1]) 
-  p3 = (p2[0] - pd[1]),(p2[1] - pd[0])
-  p4 = (p1[0] - pd[1]),(p1[1] - pd[0])
-  p5 = (p4[0] + (pd[0] - pd[1])/2),(p4[1] - (pd[0] + pd[1])/2)
+  p3,p4,p5 = branch_points(p1,p2)
   
   # Gather Points further down the tree
   squares_left,triangles_left = gather_squares_triangles(p4,p5,depth-1)
@@ -33,24 +49,194 @@ def gather_squares_triangles(p1,p2,depth):
   triangles = [[p3,p4,p5]]+triangles_left+triangles_right
   return squares,triangles
 
-def task(argv):
-  """ Draw a Depth-7 Pytagoras Tree without the use of Trig Functions """
-  # Init Canvas
-  width,height = 800,500
-  img = Image.new("RGBA",(width,height),(0,0,0))
-  draw = ImageDraw.Draw(img)
+def iter_squares_triangles(p1,p2,depth):
+  """ Lazily generate Squares and Right Triangles given 2 points
+  
+  Shapes are produced in the same order as gather_squares_triangles(),
+  without holding more than one pending base per level of the tree.
+  
+  args:
+    p1,p2 (float,float) : absolute position on base vertices
+    depth (int) : depth of the tree
+  yield:
+    square [(float,float)...] : absolute positions of vertices
+    triangle [(float,float)...] : absolute positions of vertices
+  """
+  stack = [(p1,p2,depth)]
+  while stack:
+    p1,p2,depth = stack.pop()
+    if depth == 0:
+      continue
+    p3,p4,p5 = branch_points(p1,p2)
+    yield [p1,p2,p3,p4],[p3,p4,p5]
+    stack.append((p5,p3,depth-1))
+    stack.append((p4,p5,depth-1))
 
-  # Collect and Draw Vertices for squares and right triangles
+def base_transform(p1,p2):
+  """ Similarity transform mapping the unit base onto a given base
+  
+  The unit base is (0,0),(1,0). Every subtree is constructed from its
+  base with the same vector operations, so a subtree grown from the 
+  unit base can be moved onto any other base with this transform.
+  
+  args:
+    p1,p2 (float,float) : absolute position on base vertices
+  return:
+    transform (float,float,float,float) : origin and base vector
+  """
+  return p1[0],p1[1],(p2[0] - p1[0]),(p2[1] - p1[1])
+
+def apply_transform(transform,point):
+  """ Map a point from the unit base frame to an absolute position
+  
+  args:
+    transform (float,float,float,float) : see base_transform()
+    point (float,float) : position relative to the unit base
+  return:
+    point (float,float) : absolute position
+  """
+  ox,oy,dx,dy = transform
+  x,y = point
+  return (ox + dx*x - dy*y),(oy + dy*x + dx*y)
+
+def gather_instances(p1,p2,depth,k):
+  """ Gather a Pythagoras Tree as instances of one canonical subtree
+  
+  Every subtree is a scaled and rotated copy of the whole tree. Only
+  one subtree of depth k is built (on the unit base), the rest of the 
+  tree is kept as a preorder list of transforms. Trunk nodes reuse the 
+  first square and triangle of the canonical subtree, nodes k levels 
+  above the bottom of the tree reuse all of it.
+  
+  args:
+    p1,p2 (float,float) : absolute position on base vertices
+    depth (int) : depth of the whole tree
+    k (int) : depth of the canonical subtree
+  return:
+    squares [(float,float,float,float)...] : canonical squares
+    triangles [(float,float,float)...] : canonical right triangles
+    instances [((float,float,float,float),bool)...] : preorder list of 
+      transforms, flagged True if the whole canonical subtree is used
+  """
+  k = max(1,min(k,depth))
+  squares,triangles = gather_squares_triangles((0.0,0.0),(1.0,0.0),k)
+  instances = []
+  
+  # Walk the trunk with an explicit stack, right child pushed first
+  # so that the instances come out in the same order as the shapes
+  # of gather_squares_triangles()
+  stack = [(p1,p2,depth)] if depth > 0 else []
+  while stack:
+    p1,p2,level = stack.pop()
+    if level <= k:
+      instances.append((base_transform(p1,p2),True))
+      continue
+    instances.append((base_transform(p1,p2),False))
+    p3,p4,p5 = branch_points(p1,p2)
+    stack.append((p5,p3,level-1))
+    stack.append((p4,p5,level-1))
+  return squares,triangles,instances
+
+def expand_instances(squares,triangles,instances):
+  """ Lazily expand instanced geometry into absolute positions
+  
+  args:
+    squares,triangles,instances : see gather_instances()
+  yield:
+    square (float,float,float,float) : absolute positions of vertices
+    triangle (float,float,float) : absolute positions of vertices
+  """
+  for transform,whole in instances:
+    count = len(squares) if whole else 1
+    for i in range(count):
+      yield ([apply_transform(transform,p) for p in squares[i]],
+        [apply_transform(transform,p) for p in triangles[i]])
+
+def write_svg(filename,shapes,count,width,height,precision=2):
+  """ Stream Squares and Right Triangles to a SVG file
+  
+  Shapes are written as they are consumed. Consecutive shapes sharing 
+  a fill colour are merged into one path per shape kind, and all 
+  coordinates are rounded to a fixed number of decimals.
+  
+  args:
+    filename (str) : path of the SVG file
+    shapes iter((square,triangle)...) : see iter_squares_triangles()
+    count (int) : number of shape pairs, used for colouring. Shapes
+      past count are drawn in the darkest colour
+    width,height (int) : size of the canvas
+  kwargs:
+    precision (int) : decimals kept for each coordinate
+  """
+  def subpath(points):
+    return "M" + "L".join("{:.{}f} {:.{}f}".format(x,precision,y,precision) 
+      for x,y in points) + "Z"
+  def flush(color,square_paths,triangle_paths):
+    out.write('<path fill="#{:02x}0000" stroke="#ff0000" d="'.format(color))
+    out.write("".join(square_paths))
+    out.write('"/>\n<path fill="#0000{:02x}" stroke="#0000ff" d="'.format(color))
+    out.write("".join(triangle_paths))
+    out.write('"/>\n')
+  
+  with open(filename,"w",buffering=1<<16) as out:
+    out.write('<svg xmlns="http://www.w3.org/2000/svg" width="{0}" height="{1}" '
+      'viewBox="0 0 {0} {1}">\n'.format(width,height))
+    out.write('<rect width="100%" height="100%" fill="#000000"/>\n')
+    run_color,square_paths,triangle_paths = None,[],[]
+    for i,(square,triangle) in enumerate(shapes):
+      color = max(0,min(255,int(256*(1-i/count))))
+      if color != run_color and square_paths:
+        flush(run_color,square_paths,triangle_paths)
+        square_paths,triangle_paths = [],[]
+      run_color = color
+      square_paths.append(subpath(square))
+      triangle_paths.append(subpath(triangle))
+    if square_paths:
+      flush(run_color,square_paths,triangle_paths)
+    out.write("</svg>\n")
+
+def task(argv):
+  """ Draw a Depth-7 Pytagoras Tree without the use of Trig Functions 
+  
+  Options change the depth and canvas size, --svg streams the tree to 
+  ./out/pythagoras.svg instead. Unchanged artifacts are reused from 
+  the cache unless --no-cache is passed.
+  """
+  parser = argparse.ArgumentParser(prog="pythagoras")
+  parser.add_argument("--depth",type=int,default=7)
+  parser.add_argument("--width",type=int,default=800)
+  parser.add_argument("--height",type=int,default=500)
+  parser.add_argument("--svg",action="store_true")
+  parser.add_argument("--no-cache",action="store_true")
+  args = parser.parse_args(argv[1:])
+  width,height,depth = args.width,args.height,args.depth
   p1,p2 = (width/2.3, height),(width/1.8, height)
-  squares,triangles = gather_squares_triangles(p1,p2,7)
-  for i in range(len(squares)):
-    square_color = (int(256*(1-i/len(squares))),0,0)
-    triangle_color = (0,0,int(256*(1-i/len(triangles))))
-    draw.polygon(squares[i],fill=square_color,outline=(256,0,0))
-    draw.polygon(triangles[i],fill=triangle_color,outline=(0,0,256))
-  
-  # Commit Canvas
-  img.save("./out/pythagoras.png","PNG")
+  
+  def render_svg():
+    shapes = iter_squares_triangles(p1,p2,depth)
+    write_svg("./out/pythagoras.svg",shapes,2**depth-1,width,height)
+  def render_png():
+    # Init Canvas
+    img = Image.new("RGBA",(width,height),(0,0,0))
+    draw = ImageDraw.Draw(img)
+
+    # Collect and Draw Vertices for squares and right triangles
+    squares,triangles = gather_squares_triangles(p1,p2,depth)
+    for i in range(len(squares)):
+      square_color = (int(256*(1-i/len(squares))),0,0)
+      triangle_color = (0,0,int(256*(1-i/len(triangles))))
+      draw.polygon(squares[i],fill=square_color,outline=(256,0,0))
+      draw.polygon(triangles[i],fill=triangle_color,outline=(0,0,256))
+  
+    # Commit Canvas
+    img.save("./out/pythagoras.png","PNG")
+  
+  output,render = ("./out/pythagoras.svg",render_svg) if args.svg else ("./out/pythagoras.png",render_png)
+  if args.no_cache:
+    render()
+  else:
+    params = {"depth":depth,"width":width,"height":height}
+    tasks.cache.fetch("pythagoras",params,__file__,output,render)
   return 0
   
 if __name__ == "__main__":
@@ -2,6 +2,7 @@ import tasks.pythagoras
 
 import unittest
 import logging
+import xml.etree.ElementTree
 
 class TestPythagoras(unittest.TestCase):
   def setUp(self):
@@ -32,5 +33,52 @@ class TestPythagoras(unittest.TestCase):
       logging.info("Squares made with Depth {} : {}".format(i,squares))
       sizes.append(len(squares))
     self.assertListEqual(sizes,[0,1,3,7,15])
+  def test_expand_instances(self):
+    """ Instanced tree expands to the same shapes as the direct tree """
+    logging.info("test_expand_instances()")
+    p1,p2 = (2.0,5.0),(3.0,4.5)
+    squares,triangles = tasks.pythagoras.gather_squares_triangles(p1,p2,6)
+    instanced = tasks.pythagoras.gather_instances(p1,p2,6,3)
+    expanded = list(tasks.pythagoras.expand_instances(*instanced))
+    logging.info("Instances made with Depth 6 : {}".format(instanced[2]))
+    self.assertEqual(len(expanded),len(squares))
+    for (square,triangle),direct_square,direct_triangle in zip(expanded,squares,triangles):
+      for (x,y),(xd,yd) in zip(square+triangle,direct_square+direct_triangle):
+        self.assertAlmostEqual(x,xd)
+        self.assertAlmostEqual(y,yd)
+  def test_instance_size(self):
+    """ Direct measure of the ammount of instances stored """
+    logging.info("test_instance_size()")
+    squares,_,instances = tasks.pythagoras.gather_instances((1.0,0.0),(0.0,0.0),8,3)
+    self.assertEqual(len(squares),7)
+    self.assertEqual(len(instances),63)
+    self.assertEqual(sum(whole for _,whole in instances),32)
+  def test_iter_squares_triangles(self):
+    """ Lazily generated tree matches the gathered tree """
+    logging.info("test_iter_squares_triangles()")
+    p1,p2 = (1.0,0.0),(0.0,0.0)
+    shapes = list(tasks.pythagoras.iter_squares_triangles(p1,p2,4))
+    squares,triangles = tasks.pythagoras.gather_squares_triangles(p1,p2,4)
+    self.assertListEqual(shapes,list(zip(squares,triangles)))
+  def test_write_svg(self):
+    """ Streamed SVG merges shapes of the same colour into one path """
+    logging.info("test_write_svg()")
+    shapes = tasks.pythagoras.iter_squares_triangles((1.0,0.0),(0.0,0.0),3)
+    tasks.pythagoras.write_svg("./out/pythagoras_test.svg",shapes,7,4,4)
+    svg = xml.etree.ElementTree.parse("./out/pythagoras_test.svg").getroot()
+    paths = svg.findall("{http://www.w3.org/2000/svg}path")
+    logging.info("Paths Written: {}".format([p.attrib for p in paths]))
+    self.assertEqual(len(paths),14)
+    self.assertEqual(paths[0].get("d"),"M1.00 0.00L0.00 0.00L0.00 1.00L1.00 1.00Z")
+  def test_write_svg_colour(self):
+    """ Shapes past the given count keep a valid colour """
+    logging.info("test_write_svg_colour()")
+    shapes = tasks.pythagoras.iter_squares_triangles((1.0,0.0),(0.0,0.0),4)
+    tasks.pythagoras.write_svg("./out/pythagoras_test.svg",shapes,3,4,4)
+    svg = xml.etree.ElementTree.parse("./out/pythagoras_test.svg").getroot()
+    fills = [p.get("fill") for p in svg.findall("{http://www.w3.org/2000/svg}path")]
+    logging.info("Fills Written: {}".format(fills))
+    self.assertTrue(all("-" not in fill for fill in fills))
+    self.assertListEqual(fills[-2:],["#000000","#000000"])
 if __name__ == '__main__':
   unittest.main()
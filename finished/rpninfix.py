@@ -1,4 +1,9 @@
+import asyncio
+import collections
+import concurrent.futures
+import multiprocessing
 import sys
+import time
 
 OPERATIONS = {
   "^": (4, True),
@@ -8,6 +13,30 @@ OPERATIONS = {
   "-": (2, False)
 }
 
+def combine(token,operand_left,operand_right):
+  """ Joins two operands with an operator, bracing where needed
+  args:
+    token (str): operator found in OPERATIONS
+    operand_left,operand_right (int,str): precedence and infix string
+  return:
+    operand (int,str): precedence and infix string of the expression
+  """
+  prec_left, infix_left = operand_left
+  prec_right, infix_right = operand_right
+
+  # Unwrap Operator Info
+  op_prec, op_right_assoc = OPERATIONS[token]
+
+  # Deterimine if bracing is needed
+  brace_left = prec_left < op_prec or (prec_left == op_prec and op_right_assoc)
+  brace_right = prec_right < op_prec or (prec_right == op_prec and not op_right_assoc)
+
+  # Constructing new expression string with ternary expressions
+  infix = "( "+infix_left+" )" if brace_left else infix_left
+  infix += " " + token + " "
+  infix += "( "+infix_right+" )" if brace_right else infix_right
+  return op_prec, infix
+
 def rpn_to_infix(rpn):
   """ Converts Rpn String to Infix String 
   args:
@@ -20,24 +49,12 @@ def rpn_to_infix(rpn):
   for token in rpn.split(" "):
     if token in OPERATIONS.keys():
       # Operator Case:
-      # Pop Left and Right Operands off stack and unwrap
-      prec_right, infix_right = stack.pop()
-      prec_left, infix_left = stack.pop()
+      # Pop Left and Right Operands off stack
+      operand_right = stack.pop()
+      operand_left = stack.pop()
 
-      # Unwrap Operator Info
-      op_prec, op_right_assoc = OPERATIONS[token]
-
-      # Deterimine if bracing is needed
-      brace_left = prec_left < op_prec or (prec_left == op_prec and op_right_assoc)
-      brace_right = prec_right < op_prec or (prec_right == op_prec and not op_right_assoc)
-
-      # Constructing new expression string with ternary expressions
-      infix = "( "+infix_left+" )" if brace_left else infix_left
-      infix += " " + token + " "
-      infix += "( "+infix_right+" )" if brace_right else infix_right
-
-      # Wrap and Push precedence and expression to the stack
-      stack.append((op_prec, infix))
+      # Push precedence and expression to the stack
+      stack.append(combine(token, operand_left, operand_right))
     else:
       # Base Case:
       # Wrap and Push default precedence and token
@@ -48,8 +65,300 @@ def rpn_to_infix(rpn):
   return infix
   
 
+def rpn_to_dag(rpn):
+  """ Parses Rpn String into an expression DAG of unique subexpressions
+  
+  Identical subexpressions are interned, keyed on their operator and 
+  the ids of their operands, so each one is stored only once.
+  args:
+    rpn (str): reverse polish notation formatted string
+  return:
+    nodes [(str,int,int)...]: token and operand ids of each unique 
+      subexpression, operands always preceding their operator. 
+      Operand ids are None for numbers and variables.
+    counts [int...]: occurrences of each node in the expression
+    root (int): id of the node holding the whole expression
+  """
+  nodes, counts, ids, stack = [], [], {}, []
+  for token in rpn.split(" "):
+    if token in OPERATIONS.keys():
+      # Operator Case: key on the ids of the Left and Right Operands
+      id_right = stack.pop()
+      id_left = stack.pop()
+      key = (token, id_left, id_right)
+    else:
+      # Base Case: key on the token alone
+      key = (token, None, None)
+    # Intern the subexpression if it has not been seen yet
+    if key not in ids:
+      ids[key] = len(nodes)
+      nodes.append(key)
+      counts.append(0)
+    counts[ids[key]] += 1
+    stack.append(ids[key])
+  return nodes, counts, stack[0]
+
+def dag_to_infix(nodes, root):
+  """ Converts an expression DAG to Infix String
+  
+  Every node is rendered once, shared subexpressions reuse the
+  rendered operand of their first occurrence.
+  args:
+    nodes [(str,int,int)...]: see rpn_to_dag()
+    root (int): id of the node to render
+  return:
+    infix (str): infix notation formatted string
+  """
+  rendered = []
+  for token, id_left, id_right in nodes[:root+1]:
+    if id_left is None:
+      rendered.append((9, token))
+    else:
+      rendered.append(combine(token, rendered[id_left], rendered[id_right]))
+  _, infix = rendered[root]
+  return infix
+
+def convert_batch(rpns):
+  """ Converts a chunk of Rpn Strings, used as a unit of pool work
+  args:
+    rpns [str...]: reverse polish notation formatted strings
+  return:
+    results [(bool,str)...]: success flag and infix string, or the
+      offending rpn string on failure
+  """
+  results = []
+  for rpn in rpns:
+    try:
+      results.append((True, rpn_to_infix(rpn)))
+    except (IndexError, KeyError):
+      results.append((False, rpn))
+  return results
+
+OVERSIZED = object()
+
+async def read_line(reader):
+  """ Reads one line, skipping lines past the limit of the reader
+  args:
+    reader (StreamReader): incoming lines
+  return:
+    line (bytes|OVERSIZED|None): line without trailing newline, 
+      OVERSIZED if it was too long and skipped, None at end of stream
+  """
+  try:
+    return (await reader.readuntil(b"\n"))[:-1]
+  except asyncio.IncompleteReadError as error:
+    # Last line may lack a newline
+    return error.partial or None
+  except asyncio.LimitOverrunError as error:
+    overrun = error
+  # Discard the oversized line up to and including its newline
+  while True:
+    await reader.readexactly(overrun.consumed)
+    try:
+      await reader.readuntil(b"\n")
+      return OVERSIZED
+    except asyncio.IncompleteReadError:
+      return OVERSIZED
+    except asyncio.LimitOverrunError as error:
+      overrun = error
+
+def conversion_pool():
+  """ Process pool for convert_batch()
+  
+  Workers are started by a fork server rather than forked from the 
+  server process, so they never inherit its listening or client 
+  sockets (which would keep closed connections open).
+  return:
+    executor (ProcessPoolExecutor)
+  """
+  context = multiprocessing.get_context("forkserver")
+  return concurrent.futures.ProcessPoolExecutor(mp_context=context)
+
+class ConversionServer:
+  """ Line Protocol Server for Rpn to Infix Conversion
+  
+    Each line received is an Rpn String, each line sent back is the 
+  matching Infix String (or "ERROR " followed by the Rpn String) in the 
+  same order. Requests from all connections share one bounded queue; 
+  worker tasks drain it in chunks handed to an executor. When the 
+  queue is full, connections stop reading until there is room again.
+  
+  Attributes:
+    requests (int): conversions answered
+    batches (int): chunks handed to the executor
+    errors (int): conversions that failed
+    latencies (deque): seconds spent in the server by recent requests
+  """
+  def __init__(self, executor=None, batch_size=64, backlog=1024, workers=4):
+    """ Constructor
+    kwargs:
+      executor (Executor|None): pool running convert_batch(), None 
+        uses the default executor of the event loop
+      batch_size (int): largest chunk handed to the executor
+      backlog (int): requests queued before backpressure applies
+      workers (int): chunks in flight at once
+    """
+    self.executor = executor
+    self.batch_size = batch_size
+    self.workers = workers
+    self.queue = asyncio.Queue(backlog)
+    self.tasks = []
+    self.requests, self.batches, self.errors = 0, 0, 0
+    self.latencies = collections.deque(maxlen=10000)
+    self.started = time.perf_counter()
+  async def start(self):
+    """ Starts the worker tasks """
+    self.started = time.perf_counter()
+    self.tasks = [asyncio.ensure_future(self._worker()) for _ in range(self.workers)]
+  async def close(self):
+    """ Cancels the worker tasks """
+    for worker in self.tasks:
+      worker.cancel()
+    await asyncio.gather(*self.tasks, return_exceptions=True)
+    self.tasks = []
+  async def convert(self, rpn):
+    """ Queues one conversion, waiting while the queue is full
+    args:
+      rpn (str): reverse polish notation formatted string
+    return:
+      future (Future): resolves to the response line
+    """
+    future = asyncio.get_running_loop().create_future()
+    await self.queue.put((rpn, future, time.perf_counter()))
+    return future
+  async def _worker(self):
+    """ Drains the queue in chunks and resolves their futures """
+    loop = asyncio.get_running_loop()
+    while True:
+      # Block for one request, then take whatever else is waiting
+      batch = [await self.queue.get()]
+      while len(batch) < self.batch_size and not self.queue.empty():
+        batch.append(self.queue.get_nowait())
+      rpns = [rpn for rpn, _, _ in batch]
+      try:
+        results = await loop.run_in_executor(self.executor, convert_batch, rpns)
+      except Exception as error:
+        # e.g. BrokenProcessPool, fail this chunk but keep draining
+        self.errors += len(batch)
+        for _, future, _ in batch:
+          if not future.cancelled():
+            future.set_exception(error)
+        continue
+      finished = time.perf_counter()
+      self.batches += 1
+      for (rpn, future, queued), (ok, infix) in zip(batch, results):
+        self.requests += 1
+        self.errors += not ok
+        self.latencies.append(finished - queued)
+        if not future.cancelled():
+          future.set_result(infix if ok else "ERROR " + infix)
+  async def handle(self, reader, writer):
+    """ Serves one connection (asyncio.start_server callback)
+    
+    Reading stops as soon as replies can no longer be written, e.g.
+    when the client disconnects without reading them.
+    args:
+      reader (StreamReader): incoming Rpn Strings, one per line
+      writer (StreamWriter): outgoing Infix Strings, one per line
+    """
+    # Bounded so a client that stops reading also stops being read
+    pending = asyncio.Queue(self.batch_size)
+    async def respond():
+      while True:
+        future = await pending.get()
+        if future is None:
+          break
+        writer.write((await future + "\n").encode())
+        await writer.drain()
+    async def put(item):
+      # Wait for room in pending, unless the responder fails first
+      putter = asyncio.ensure_future(pending.put(item))
+      await asyncio.wait([putter, responder], return_when=asyncio.FIRST_COMPLETED)
+      putter.cancel()
+      return not responder.done()
+    def reject(reply):
+      # Answer in place so the replies stay in order
+      future = asyncio.get_running_loop().create_future()
+      future.set_result("ERROR " + reply)
+      self.requests += 1
+      self.errors += 1
+      return future
+    responder = asyncio.ensure_future(respond())
+    try:
+      while True:
+        line = await read_line(reader)
+        if line is None:
+          if await put(None):
+            await asyncio.wait([responder])
+          break
+        if line is OVERSIZED:
+          future = reject("line too long")
+        else:
+          try:
+            future = await self.convert(line.decode().strip())
+          except UnicodeDecodeError:
+            future = reject(line.decode(errors="replace").strip())
+        if not await put(future):
+          break
+    except ConnectionError:
+      pass
+    finally:
+      responder.cancel()
+      await asyncio.gather(responder, return_exceptions=True)
+      writer.close()
+  def stats(self):
+    """ Latency and Throughput Counters
+    return:
+      stats (dict): counts, requests per second since start, and 
+        median and 99th percentile latency in seconds
+    """
+    latencies = sorted(self.latencies)
+    def percentile(p):
+      return latencies[int(p*(len(latencies)-1))] if latencies else 0.0
+    return {
+      "requests": self.requests,
+      "batches": self.batches,
+      "errors": self.errors,
+      "throughput": self.requests / (time.perf_counter() - self.started),
+      "p50": percentile(0.50),
+      "p99": percentile(0.99)
+    }
+
+async def serve(port=8765, path=None):
+  """ Runs a ConversionServer backed by a process pool until cancelled
+  kwargs:
+    port (int): TCP port to listen on
+    path (str|None): Unix socket to listen on instead of TCP
+  """
+  with conversion_pool() as executor:
+    server = ConversionServer(executor)
+    await server.start()
+    if path is None:
+      listener = await asyncio.start_server(server.handle, port=port)
+    else:
+      listener = await asyncio.start_unix_server(server.handle, path)
+    try:
+      async with listener:
+        await listener.serve_forever()
+    finally:
+      await server.close()
+      print(server.stats())
+
 def task(argv):
-  """ Parse a rpn strings and return their corresponding infix strings """
+  """ Parse a rpn strings and return their corresponding infix strings 
+  
+  Passing --serve [PORT|PATH] keeps a conversion server running instead.
+  """
+  if "--serve" in argv:
+    address = argv[argv.index("--serve")+1:][:1]
+    try:
+      if not address or address[0].isdigit():
+        asyncio.run(serve(port=int(address[0]) if address else 8765))
+      else:
+        asyncio.run(serve(path=address[0]))
+    except KeyboardInterrupt:
+      pass
+    return 0
   rpns = ["3 4 2 * 1 5 - 2 3 ^ ^ / +","1 2 + 3 4 + ^ 5 6 + ^"]
   for rpn in rpns:
     infix = rpn_to_infix(rpn)
@@ -1,5 +1,7 @@
 import tasks.rpninfix
 
+import asyncio
+import concurrent.futures
 import unittest
 import logging
 
@@ -20,6 +22,151 @@ class TestRpnInfix(unittest.TestCase):
     rpn = "5 6 ^ 7 ^"
     infix = tasks.rpninfix.rpn_to_infix(rpn)
     self.assertEqual(infix,"( 5 ^ 6 ) ^ 7")
+  def test_shared_subexpressions(self):
+    """ Testing Interning of Repeated Subexpressions """ 
+    logging.info("test_shared_subexpressions()")
+    rpn = "1 2 + 1 2 + * 1 2 + -"
+    nodes, counts, root = tasks.rpninfix.rpn_to_dag(rpn)
+    logging.info("Nodes: {} Counts: {}".format(nodes,counts))
+    self.assertEqual(len(nodes),5)
+    self.assertListEqual(counts,[3,3,3,1,1])
+    infix = tasks.rpninfix.dag_to_infix(nodes, root)
+    self.assertEqual(infix,"( 1 + 2 ) * ( 1 + 2 ) - ( 1 + 2 )")
+  def test_dag_matches_infix(self):
+    """ Testing DAG Conversion against Direct Conversion """ 
+    logging.info("test_dag_matches_infix()")
+    for rpn in ["3 4 2 * 1 5 - 2 3 ^ ^ / +","1 2 + 3 4 + ^ 5 6 + ^","x"]:
+      nodes, _, root = tasks.rpninfix.rpn_to_dag(rpn)
+      infix = tasks.rpninfix.dag_to_infix(nodes, root)
+      self.assertEqual(infix,tasks.rpninfix.rpn_to_infix(rpn))
+  def test_server(self):
+    """ Testing Conversion Server with a Local Client """ 
+    logging.info("test_server()")
+    rpns = ["3 4 5 - *","5 6 ^ 7 ^","+"] * 10
+    async def exchange():
+      server = tasks.rpninfix.ConversionServer(batch_size=4, backlog=8)
+      await server.start()
+      listener = await asyncio.start_server(server.handle, "127.0.0.1", 0)
+      port = listener.sockets[0].getsockname()[1]
+      reader, writer = await asyncio.open_connection("127.0.0.1", port)
+      writer.write("".join(rpn + "\n" for rpn in rpns).encode())
+      writer.write_eof()
+      lines = [line.decode().strip() async for line in reader]
+      writer.close()
+      listener.close()
+      await listener.wait_closed()
+      await server.close()
+      return lines, server.stats()
+    lines, stats = asyncio.run(exchange())
+    logging.info("Responses: {} Stats: {}".format(lines, stats))
+    self.assertListEqual(lines[:3],["3 * ( 4 - 5 )","( 5 ^ 6 ) ^ 7","ERROR +"])
+    self.assertEqual(len(lines),30)
+    self.assertEqual(stats["requests"],30)
+    self.assertEqual(stats["errors"],10)
+  def test_server_abort(self):
+    """ Testing Conversion Server with a Client Aborting Mid-Stream """ 
+    logging.info("test_server_abort()")
+    async def exchange():
+      server = tasks.rpninfix.ConversionServer(batch_size=4, backlog=8)
+      await server.start()
+      finished = asyncio.Event()
+      async def handle(reader, writer):
+        await server.handle(reader, writer)
+        finished.set()
+      listener = await asyncio.start_server(handle, "127.0.0.1", 0)
+      port = listener.sockets[0].getsockname()[1]
+      reader, writer = await asyncio.open_connection("127.0.0.1", port)
+      writer.write(("3 4 5 - *\n" * 200000).encode())
+      await asyncio.sleep(0.2)
+      writer.transport.abort()
+      await asyncio.wait_for(finished.wait(), 5)
+      listener.close()
+      await listener.wait_closed()
+      await server.close()
+      return server.stats()
+    stats = asyncio.run(exchange())
+    logging.info("Stats: {}".format(stats))
+    self.assertGreater(stats["requests"],0)
+  def test_server_undecodable(self):
+    """ Testing Conversion Server with a Non UTF-8 Line """ 
+    logging.info("test_server_undecodable()")
+    async def exchange():
+      server = tasks.rpninfix.ConversionServer()
+      await server.start()
+      listener = await asyncio.start_server(server.handle, "127.0.0.1", 0)
+      port = listener.sockets[0].getsockname()[1]
+      reader, writer = await asyncio.open_connection("127.0.0.1", port)
+      writer.write(b"1 2 +\n\xff\n3 4 +\n")
+      writer.write_eof()
+      lines = [line.decode().strip() async for line in reader]
+      writer.close()
+      listener.close()
+      await listener.wait_closed()
+      await server.close()
+      return lines
+    lines = asyncio.run(exchange())
+    logging.info("Responses: {}".format(lines))
+    self.assertListEqual(lines,["1 + 2","ERROR \ufffd","3 + 4"])
+  def test_server_broken_executor(self):
+    """ Testing Conversion Server with a Failing Executor """ 
+    logging.info("test_server_broken_executor()")
+    class BrokenExecutor(concurrent.futures.Executor):
+      def submit(self, fn, *args, **kwargs):
+        raise concurrent.futures.BrokenExecutor("pool is gone")
+    async def exchange():
+      server = tasks.rpninfix.ConversionServer(BrokenExecutor(), workers=1)
+      await server.start()
+      futures = [await server.convert("1 2 +") for _ in range(3)]
+      results = await asyncio.gather(*futures, return_exceptions=True)
+      alive = not server.tasks[0].done()
+      await server.close()
+      return results, alive, server.stats()
+    results, alive, stats = asyncio.run(exchange())
+    logging.info("Results: {} Stats: {}".format(results, stats))
+    self.assertTrue(all(isinstance(r, concurrent.futures.BrokenExecutor) for r in results))
+    self.assertTrue(alive)
+    self.assertEqual(stats["errors"],3)
+  def test_server_process_pool(self):
+    """ Testing Conversion Server backed by a Process Pool """ 
+    logging.info("test_server_process_pool()")
+    async def exchange():
+      with tasks.rpninfix.conversion_pool() as executor:
+        server = tasks.rpninfix.ConversionServer(executor)
+        await server.start()
+        listener = await asyncio.start_server(server.handle, "127.0.0.1", 0)
+        port = listener.sockets[0].getsockname()[1]
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        writer.write(b"3 4 5 - *\n" * 100)
+        writer.write_eof()
+        # Reads to EOF, which only arrives if no worker holds the socket
+        data = await asyncio.wait_for(reader.read(), 10)
+        writer.close()
+        listener.close()
+        await listener.wait_closed()
+        await server.close()
+        return data.decode().splitlines()
+    lines = asyncio.run(exchange())
+    self.assertListEqual(lines,["3 * ( 4 - 5 )"] * 100)
+  def test_server_oversized(self):
+    """ Testing Conversion Server with a Line past the Stream Limit """ 
+    logging.info("test_server_oversized()")
+    async def exchange():
+      server = tasks.rpninfix.ConversionServer()
+      await server.start()
+      listener = await asyncio.start_server(server.handle, "127.0.0.1", 0, limit=1024)
+      port = listener.sockets[0].getsockname()[1]
+      reader, writer = await asyncio.open_connection("127.0.0.1", port)
+      writer.write(b"1 2 +\n" + b"1 " * 5000 + b"\n3 4 +\n")
+      writer.write_eof()
+      lines = [line.decode().strip() async for line in reader]
+      writer.close()
+      listener.close()
+      await listener.wait_closed()
+      await server.close()
+      return lines
+    lines = asyncio.run(exchange())
+    logging.info("Responses: {}".format(lines))
+    self.assertListEqual(lines,["1 + 2","ERROR line too long","3 + 4"])
 
 if __name__ == '__main__':
   unittest.main()
@@ -0,0 +1,179 @@
+import argparse
+import importlib
+import itertools
+import multiprocessing
+import multiprocessing.connection
+import os
+import resource
+import sys
+import time
+
+import tasks.cache
+
+def expand_grid(grid):
+  """ Expand a grid of options into every combination of argv
+
+  args:
+    grid [(str,[str|None...])...] : option and the values it takes, 
+      None stands for a flag passed without a value
+  return:
+    variants [[str...]...] : argv (without program name) per combination
+  """
+  options = [option for option,_ in grid]
+  variants = []
+  for values in itertools.product(*(values for _,values in grid)):
+    argv = []
+    for option,value in zip(options,values):
+      argv += [option] if value is None else [option,str(value)]
+    variants.append(argv)
+  return variants
+
+def parse_grid(tokens):
+  """ Parse command line tokens into a grid of options
+
+  e.g. ["--depth","5,6","--svg"] -> [("--depth",["5","6"]),("--svg",[None])]
+
+  args:
+    tokens [str...] : options, each followed by comma separated values
+  return:
+    grid [(str,[str|None...])...] : see expand_grid()
+  """
+  grid = []
+  for token in tokens:
+    if token.startswith("--") or not grid:
+      grid.append((token,[None]))
+    else:
+      grid[-1] = grid[-1][0],token.split(",")
+  return grid
+
+def run_job(module,argv,directory,memory=None,cache=None):
+  """ Run one task(argv) inside a forked process
+
+  The job gets its own working directory holding ./out and ./logs, and
+  its stdout and stderr are written to output.txt in that directory.
+
+  args:
+    module (str) : module exposing task(argv), e.g. tasks.chaos
+    argv [str...] : arguments passed after the program name
+    directory (str) : working directory of the job
+  kwargs:
+    memory (int|None) : address space limit in bytes
+    cache (str|None) : artifact cache shared with other jobs
+  """
+  if cache:
+    os.environ["ROSETTA_CACHE"] = cache
+  os.makedirs(os.path.join(directory,"out"),exist_ok=True)
+  os.makedirs(os.path.join(directory,"logs"),exist_ok=True)
+  os.chdir(directory)
+  if memory:
+    resource.setrlimit(resource.RLIMIT_AS,(memory,memory))
+  # Redirect both the file descriptors and the Python streams, which
+  # may not be bound to descriptors 1 and 2 (e.g. under a test runner)
+  sys.stdout.flush()
+  sys.stderr.flush()
+  stream = open("output.txt","w",buffering=1)
+  os.dup2(stream.fileno(),1)
+  os.dup2(stream.fileno(),2)
+  sys.stdout = sys.stderr = stream
+  sys.exit(importlib.import_module(module).task([module]+argv))
+
+def sweep(module,variants,workers=None,timeout=None,memory=None,directory="./out/sweep",cache=None):
+  """ Run task(argv) for every variant on a pool of forked processes
+
+  The module is imported once before forking, so jobs skip interpreter
+  start up and imports. Jobs running past the timeout are terminated.
+  All jobs share one artifact cache (see tasks.cache) rather than one 
+  per working directory.
+
+  args:
+    module (str) : module exposing task(argv), e.g. tasks.chaos
+    variants [[str...]...] : argv (without program name) per job
+  kwargs:
+    workers (int|None) : jobs running at once, defaults to cpu count
+    timeout (float|None) : seconds a job may run
+    memory (int|None) : address space limit in bytes per job
+    directory (str) : parent of the per job working directories
+    cache (str|None) : shared artifact cache, defaults to the cache of 
+      the calling process
+  return:
+    results [dict...] : argv, status (exit code or "timeout"), run
+      time in seconds and working directory of every job
+  """
+  importlib.import_module(module)
+  context = multiprocessing.get_context("fork")
+  workers = workers or os.cpu_count()
+  directory = os.path.abspath(directory)
+  cache = os.path.abspath(cache or tasks.cache.cache_directory())
+  pending = list(enumerate(variants))[::-1]
+  running = {}
+  results = [None]*len(variants)
+  while pending or running:
+    # Fill free workers
+    while pending and len(running) < workers:
+      index,argv = pending.pop()
+      job_directory = os.path.join(directory,str(index))
+      process = context.Process(target=run_job,args=(module,argv,job_directory,memory,cache))
+      process.start()
+      running[process.sentinel] = index,process,time.perf_counter()
+      results[index] = {"argv":argv,"status":None,"seconds":0.0,"directory":job_directory}
+
+    # Wait for a job to finish or the nearest timeout
+    wait = None
+    if timeout is not None:
+      nearest = min(started for _,_,started in running.values())
+      wait = max(0.0,nearest + timeout - time.perf_counter())
+    multiprocessing.connection.wait(list(running),wait)
+
+    # Collect finished and expired jobs
+    for sentinel,(index,process,started) in list(running.items()):
+      elapsed = time.perf_counter() - started
+      if process.is_alive():
+        if timeout is None or elapsed < timeout:
+          continue
+        process.terminate()
+        process.join()
+        results[index]["status"] = "timeout"
+      else:
+        process.join()
+        results[index]["status"] = process.exitcode
+      results[index]["seconds"] = elapsed
+      del running[sentinel]
+  return results
+
+def format_table(results):
+  """ Summarize sweep results as a plain text table
+
+  args:
+    results [dict...] : see sweep()
+  return:
+    table (str)
+  """
+  rows = [("job","status","seconds","argv")]
+  for index,result in enumerate(results):
+    rows.append((str(index),str(result["status"]),
+      "{:.3f}".format(result["seconds"])," ".join(result["argv"])))
+  widths = [max(len(row[i]) for row in rows) for i in range(3)]
+  return "\n".join("  ".join(cell.ljust(width) for cell,width in zip(row,widths+[0])).rstrip()
+    for row in rows)
+
+def task(argv):
+  """ Sweep a task over a grid of options
+
+  e.g. tasks.sweep --timeout 60 tasks.chaos --points 1000,10000 --seed 1,2
+  """
+  parser = argparse.ArgumentParser(prog="sweep")
+  parser.add_argument("--workers",type=int)
+  parser.add_argument("--timeout",type=float)
+  parser.add_argument("--memory",type=int,metavar="MB")
+  parser.add_argument("--directory",default="./out/sweep")
+  parser.add_argument("module")
+  parser.add_argument("grid",nargs=argparse.REMAINDER)
+  args = parser.parse_args(argv[1:])
+  grid = parse_grid(args.grid)
+  memory = args.memory << 20 if args.memory else None
+  results = sweep(args.module,expand_grid(grid),args.workers,args.timeout,memory,args.directory)
+  print(format_table(results))
+  return 0 if all(result["status"] == 0 for result in results) else 1
+
+if __name__ == "__main__":
+  sys.exit(task(sys.argv))
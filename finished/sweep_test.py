@@ -0,0 +1,52 @@
+import tasks.sweep
+
+import unittest
+import logging
+import os
+import shutil
+
+class TestSweep(unittest.TestCase):
+  def setUp(self):
+    """ Test Case Enviroment """
+    logging.basicConfig(filename="./logs/sweep_test.log",level=logging.DEBUG)
+    logging.info('TestSweep initialized')
+  def test_expand_grid(self):
+    """ Every combination of options becomes one argv """ 
+    logging.info("test_expand_grid()")
+    grid = tasks.sweep.parse_grid(["--depth","5,6","--seed","1,2,3","--svg"])
+    variants = tasks.sweep.expand_grid(grid)
+    logging.info("Variants: {}".format(variants))
+    self.assertEqual(len(variants),6)
+    self.assertListEqual(variants[0],["--depth","5","--seed","1","--svg"])
+  def test_sweep_output(self):
+    """ Jobs run in their own directory with their output collected """ 
+    logging.info("test_sweep_output()")
+    results = tasks.sweep.sweep("tasks.rpninfix",[[],[]],directory="./out/sweep_test")
+    logging.info("Results: {}".format(results))
+    self.assertListEqual([result["status"] for result in results],[0,0])
+    with open(os.path.join(results[1]["directory"],"output.txt")) as stream:
+      self.assertIn("3 + 4 * 2 / ( 1 - 5 ) ^ 2 ^ 3",stream.read())
+  def test_sweep_timeout(self):
+    """ Jobs running past the timeout are terminated """ 
+    logging.info("test_sweep_timeout()")
+    variants = [["--points","100000000","--seed","1","--svg","--no-cache"]]
+    results = tasks.sweep.sweep("tasks.chaos",variants,timeout=0.2,directory="./out/sweep_test")
+    logging.info("Results: {}".format(results))
+    self.assertEqual(results[0]["status"],"timeout")
+    logging.info("\n" + tasks.sweep.format_table(results))
+  def test_sweep_cache(self):
+    """ Jobs share one artifact cache """ 
+    logging.info("test_sweep_cache()")
+    cache = "./out/sweep_test_cache"
+    shutil.rmtree(cache,ignore_errors=True)
+    variants = [["--points","100","--seed","1","--svg"]]
+    for _ in range(2):
+      results = tasks.sweep.sweep("tasks.chaos",variants,directory="./out/sweep_test",cache=cache)
+      self.assertEqual(results[0]["status"],0)
+    artifacts = [name for name in os.listdir(cache) if name.endswith(".svg")]
+    logging.info("Shared Artifacts: {}".format(artifacts))
+    self.assertEqual(len(artifacts),1)
+    self.assertFalse(os.path.exists(os.path.join(results[0]["directory"],"out","cache")))
+
+if __name__ == '__main__':
+  unittest.main()
@@ -1,8 +1,73 @@
 import functools
+import mmap
 import numbers
 import re
 import sys
 
+FIBONACCI = [0,1]
+FIBONACCI_LIMIT = 1 << 12
+
+def fibonacci(n):
+  """ Fibonacci Number F(n), with F(0) = 0 and F(1) = 1
+  
+  Numbers below FIBONACCI_LIMIT are kept in a table grown on demand, 
+  larger ones are computed by fast doubling without being stored.
+  
+  args:
+    n (int) : non negative index
+  return:
+    f (int) : F(n)
+  raise:
+    ValueError : n is negative
+  """
+  if n < 0:
+    raise ValueError("Negative Fibonacci Index : {}".format(n))
+  if n < len(FIBONACCI):
+    return FIBONACCI[n]
+  if n < FIBONACCI_LIMIT:
+    while len(FIBONACCI) <= n:
+      FIBONACCI.append(FIBONACCI[-1]+FIBONACCI[-2])
+    return FIBONACCI[n]
+  return fibonacci_pair(n)[0]
+
+def fibonacci_pair(n):
+  """ Consecutive Fibonacci Numbers F(n) and F(n+1)
+  
+  Fast doubling, O(log n) multiplications, for indices past the table:
+    F(2k) = F(k)*(2F(k+1) - F(k)) 
+    F(2k+1) = F(k)^2 + F(k+1)^2
+  
+  args:
+    n (int) : non negative index
+  return:
+    a,b (int,int) : F(n), F(n+1)
+  raise:
+    ValueError : n is negative
+  """
+  if n < 0:
+    raise ValueError("Negative Fibonacci Index : {}".format(n))
+  if n+1 < FIBONACCI_LIMIT:
+    return fibonacci(n),fibonacci(n+1)
+  a,b = 0,1
+  for bit in bin(n)[2:]:
+    a,b = a*(2*b - a),a*a + b*b
+    if bit == "1":
+      a,b = b,a+b
+  return a,b
+
+def lucas(n):
+  """ Lucas Number L(n), with L(0) = 2 and L(1) = 1
+  
+  args:
+    n (int) : non negative index
+  return:
+    l (int) : L(n) = 2F(n+1) - F(n)
+  raise:
+    ValueError : n is negative
+  """
+  a,b = fibonacci_pair(n)
+  return 2*b - a
+
 @functools.total_ordering
 class Z:
   """ Zeckendorf Representation of Integer
@@ -24,6 +89,9 @@ class Z:
   Attributes:
     sign (bool) : whether the value is positive or negative
     value (int) : positive bitstring in canonical form (see above.)
+      Encoded on first use when constructed from a Number.
+    _magnitude (int|None) : cached int conversion of value, 
+      filled on first type conversion to int and cleared with value.
 
   References and Sources:
     [1] : Connor Ahlbach, Jeremy Usatine, Nicholas Pippenger
@@ -42,15 +110,27 @@ class Z:
       TypeError : param is can not convert to Z
     """
     if param is None: # Defualt Constructor
-      self.sign,self.value = True,0
+      self.sign,self._value,self._magnitude = True,0,0
     elif type(param) == Z: # Copy Constructor
-      self.sign,self.value = param.sign,param.value
+      self.sign,self._value,self._magnitude = param.sign,param._value,param._magnitude
     elif type(param) == str: # String to Z Type Conversion
       self.sign, self.value = self._from_str(param)
     elif isinstance(param,numbers.Number): # Numeric to Z Type Conversion
-      self.sign, self.value = self._from_numeric(param)
+      # Bitstring is encoded from the magnitude when first needed
+      self.sign = abs(param) == param
+      self._value,self._magnitude = None,abs(int(param))
     else:
       raise TypeError("Can't Cast to Z, given type {}".format(type(param)))
+  @property
+  def value(self):
+    """ Bitstring, encoded from the cached magnitude if missing """
+    if self._value is None:
+      self._value = self._from_numeric(self._magnitude)
+    return self._value
+  @value.setter
+  def value(self,value):
+    """ Replaces the bitstring, dropping the cached magnitude """
+    self._value,self._magnitude = value,None
   def _from_str(self,param):
     """ String to Z type conversion helper
     
@@ -74,28 +154,28 @@ class Z:
         value |= i
       i <<= 1
     return sign,value
-  def _from_numeric(self,param):
+  def _from_numeric(self,magnitude):
     """ Numeric to Z type conversion helper
     
-    Truncates to Int and Converts to Z
+    Converts a non negative Int to a bitstring
     
     args:
-      param (Numeric) : See Constructor.
+      magnitude (int) : absolute value of the truncated Number
     return:
-      sign (bool) : See Class Attr.
       value (int) : See Class Attr.
     """
-    sign = abs(param) == param
-    value,stream = 0,abs(int(param))
-    i,a,b = 1,1,1
-    while stream >= b:
-      i,a,b=i<<1,b,a+b
+    value,stream = 0,magnitude
+    # Start above the largest Fibonacci Number needed, F(k) > magnitude 
+    # since F(k) >= phi^(k-2) and 1477/1024 > 1/log2(phi)
+    k = (stream.bit_length()*1477 >> 10) + 3
+    a,b = fibonacci_pair(k-1)
+    i = 1 << (k-2)
     while a > 0:
       if stream >= b:
         stream -= b
         value |= i
       i,a,b=i>>1,b-a,a
-    return sign,value
+    return value
   def _from_bitstring(self,sign,bitstring):
     za = Z()
     za.value = self._canonical_form(bitstring)
@@ -105,17 +185,23 @@ class Z:
   def __int__(self):
     """ Z to int type conversion
     
+    The magnitude is computed once and cached alongside the bitstring.
+    
     return:
       out (int) : sum of fibonacci numbers
     """
-    out,i,a,b = 0,1,1,1
-    while self.value >= b:
-      i,a,b = i<<1,b,b+a
-    while a > 0:
-      if self.value&i:
-        out += b 
-      i,a,b = i>>1,b-a,a
-    return out if self.sign else -out
+    if self._magnitude is None:
+      value = self.value
+      # Bit i holds F(p+1) where p is the bit length
+      i = 1 << value.bit_length() >> 1
+      a,b = fibonacci_pair(value.bit_length())
+      out = 0
+      while i:
+        if value&i:
+          out += b 
+        i,a,b = i>>1,b-a,a
+      self._magnitude = out
+    return self._magnitude if self.sign else -self._magnitude
   def __float__(self):
     """ Z to int to float conversion """
     return float(int(self))
@@ -394,20 +480,99 @@ class Z:
       summation = za.value ^ zb.value
     summation = self._reduce_carry(carry,summation)
     return self._from_bitstring(sign_res,summation)
+  @staticmethod
+  def sum(iterable,start=None):
+    """ Zeckendorf Bulk Addition with Deferred Normalization
+    
+    Operands are not normalized one by one. Instead each bit position 
+    keeps a count of the operands that set it, held as a binary counter 
+    sliced across bitstrings: plane j holds bit j of every count, and 
+    adding an operand is a ripple of Xor/And through the planes.
+    Positive and negative operands are counted separately.
+    
+    Once all operands are counted, every plane is put in canonical form
+    and the planes are combined by repeated doubling, costing a number
+    of additions logarithmic in the number of operands.
+    
+    args:
+      iterable (iter(Z...)) : values to be summed
+    kwargs:
+      start (Z|None) : value added to the sum, Z("0z0") if None
+    return:
+      total (Z)
+    raise:
+      TypeError : start or an operand is not of type Z
+    """
+    if start is not None and type(start) is not Z:
+      raise TypeError("Must be type Z . Given Type {}".format(type(start)))
+    planes = {True:[],False:[]}
+    for operand in iterable:
+      if type(operand) is not Z:
+        raise TypeError("Must be type Z . Given Type {}".format(type(operand)))
+      # Increment the counts of every position set in the operand
+      counter,carry,j = planes[operand.sign],operand.value,0
+      while carry:
+        if j == len(counter):
+          counter.append(0)
+        counter[j],carry = counter[j]^carry,counter[j]&carry
+        j += 1
+    total = Z("0z0") if start is None else +start
+    for sign,counter in planes.items():
+      part = Z("0z0")
+      for plane in reversed(counter):
+        part = part + part + Z()._from_bitstring(True,plane)
+      total += part if sign else -part
+    return total
+  def to_bytes(self):
+    """ Z to packed binary conversion
+    
+    A LEB128 varint header holding the byte length shifted left once, 
+    with the low bit set for negative non zero values, followed by the bitstring
+    in little-endian bytes.
+    
+    return:
+      data (bytes)
+    """
+    length = (self.value.bit_length()+7) >> 3
+    # Zero is always written positive, as Z._from_bitstring() does
+    header,prefix = bytearray(),(length << 1) | (not self.sign and bool(self.value))
+    while prefix >> 7:
+      header.append((prefix & 127) | 128)
+      prefix >>= 7
+    header.append(prefix)
+    return bytes(header) + self.value.to_bytes(length,"little")
+  @staticmethod
+  def from_bytes(data):
+    """ Packed binary to Z conversion
+    args:
+      data (bytes-like) : one value, see Z.to_bytes()
+    return:
+      z (Z)
+    raise:
+      ValueError : truncated, trailing or non canonical data
+    """
+    z,end = unpack_from(data)
+    if z is None or end != len(data):
+      raise ValueError("Malformed Bytes : {} bytes".format(len(data)))
+    return z
   def __sub__(self, other):
     """ Subtraction as Signed Addition"""
     return self + (-other)
   def __mul__(self, other):
-    """ Repeated Addition of Fibonacchi Multiples of the multiplier. """
+    """ Repeated Addition of Fibonacchi Multiples of the multiplier. 
+    
+    The Fibonacchi Number matching bit i is the bitstring i itself,
+    so only the multiples need Zeckendorf arithmetic.
+    """
     res_sign = not (self.sign ^ other.sign)
     product,multiplier,multiplicand = Z("0z0"),abs(other),abs(self)
-    i,a,b,za,zb = 1,Z("0z1"),Z("0z1"),multiplicand,multiplicand
-    while multiplier > b:
-      i,a,b,za,zb = i<<1,b,b+a,zb,zb+za
-    while a > Z("0z0"):
+    i,top,za,zb = 1,multiplier.value>>1,multiplicand,multiplicand
+    while top:
+      i,top,za,zb = i<<1,top>>1,zb,zb+za
+    while i:
       if multiplier.value&i:
         product += zb
-      i,a,b,za,zb = i>>1,b-a,a,zb-za,za
+      i,za,zb = i>>1,zb-za,za
     return +product if res_sign else -product
   def __divmod__(self, other):
     """ Repeated Subtraction of Fibonacchi Multiples of the divisor.
@@ -416,15 +581,17 @@ class Z:
       remainder (Z)
     """
     res_sign = not (self.sign ^ other.sign)
-    quotient,remainder,divisor = Z("0z0"),abs(self),abs(other)
-    a,b,za,zb = Z("0z1"),Z("0z1"),divisor,divisor    
+    quotient,remainder,divisor = 0,abs(self),abs(other)
+    i,za,zb = 1,divisor,divisor    
     while remainder > zb:
-      a,b,za,zb = b,b+a,zb,zb+za
+      i,za,zb = i<<1,zb,zb+za
     while remainder >= divisor:
       if remainder >= zb:
-        quotient += b
+        # Greedy subtraction never sets neighbouring quotient bits
+        quotient |= i
         remainder -= zb
-      a,b,za,zb = b-a,a,zb-za,za
+      i,za,zb = i>>1,zb-za,za
+    quotient = self._from_bitstring(True,quotient)
     if res_sign:
       return +quotient,+remainder
     else:
@@ -443,13 +610,13 @@ class Z:
       raise ValueError("Negative Power or 0^0 detected")
     res_sign = (abs(other)%Z("0z10") == Z("0z1")) or self.sign
     power,base,exponent = Z("0z1"),abs(self),abs(other)
-    i,a,b,za,zb = 1,Z("0z1"),Z("0z1"),base,base
-    while exponent > b:
-      i,a,b,za,zb = i<<1,b,b+a,zb,zb*za
-    while a > Z("0z0"):
+    i,top,za,zb = 1,exponent.value>>1,base,base
+    while top:
+      i,top,za,zb = i<<1,top>>1,zb,zb*za
+    while i:
       if exponent.value&i:
         power *= zb
-      i,a,b,za,zb = i>>1,b-a,a,zb//za,za
+      i,za,zb = i>>1,zb//za,za
     return +power if res_sign else -power
   def __neg__(self):
     """ Calls _from_bitstring() on self to invert sign """
@@ -461,6 +628,132 @@ class Z:
     """ Calls _from_bitstring() on self to turn positive"""
     return self._from_bitstring(True,self.value)
 
+def iter_zeckendorf(start=None,stop=None):
+  """ Consecutive Integers in Zeckendorf Representation
+  
+  Each non negative value is derived from the last by setting its
+  lowest bit (or trading F(2) for F(3) when already set) and carrying 
+  with Z._canonical_form(), instead of encoding every integer anew.
+  Negative values step with Zeckendorf Addition.
+  
+  kwargs:
+    start (Z|None) : first value, Z("0z0") if None
+    stop (Z|None) : value to stop before, endless if None
+  yield:
+    z (Z)
+  """
+  z,one = Z(start),Z("0z1")
+  while stop is None or z < stop:
+    yield z
+    if z.sign:
+      value = (z.value ^ 1) | 2 if z.value & 1 else z.value | 1
+      z = Z()
+      z.value = z._canonical_form(value)
+    else:
+      z = z + one
+
+def unpack_from(buffer,offset=0):
+  """ Decode one packed Z from a buffer without copying the bitstring
+  
+  args:
+    buffer (bytes-like) : data holding packed values, see Z.to_bytes()
+  kwargs:
+    offset (int) : position of the value in buffer
+  return:
+    z (Z|None) : decoded value, None if buffer ends before it does
+    end (int) : position past the value, or the least length of buffer
+      needed to decode it
+  raise:
+    ValueError : header is overlong, or bitstring is not in canonical 
+      form, is zero padded, or is a negative zero
+  """
+  prefix,shift,position = 0,0,offset
+  while True:
+    if position >= len(buffer):
+      return None,position+1
+    byte = buffer[position]
+    prefix |= (byte & 127) << shift
+    shift,position = shift+7,position+1
+    if not byte & 128:
+      break
+  if shift > 7 and not byte:
+    # Overlong header, to_bytes() never writes a trailing zero group
+    raise ValueError("Overlong Header at offset {}".format(offset))
+  end = position + (prefix >> 1)
+  if end > len(buffer):
+    return None,end
+  value = int.from_bytes(buffer[position:end],"little")
+  if value & (value >> 1):
+    raise ValueError("Non Canonical Bitstring at offset {}".format(offset))
+  if end > position and not buffer[end-1]:
+    raise ValueError("Zero Padded Bitstring at offset {}".format(offset))
+  if prefix & 1 and not value:
+    raise ValueError("Negative Zero at offset {}".format(offset))
+  z = Z()
+  z.sign,z.value = not prefix & 1,value
+  return z,end
+
+def write_packed(stream,values):
+  """ Write Z values to a binary stream in packed form
+  args:
+    stream (BufferedIOBase) : binary file opened for writing
+    values (iter(Z...)) : values to be written
+  """
+  for z in values:
+    stream.write(z.to_bytes())
+
+def read_packed(stream,chunk_size=1<<16):
+  """ Lazily read packed Z values from a binary stream in chunks
+  
+  Values larger than a chunk are read with one exact sized read.
+  
+  args:
+    stream (BufferedIOBase) : binary file opened for reading
+  kwargs:
+    chunk_size (int) : bytes read at a time
+  yield:
+    z (Z)
+  raise:
+    ValueError : stream ends in the middle of a value
+  """
+  buffer,offset = b"",0
+  while True:
+    z,end = unpack_from(buffer,offset)
+    if z is not None:
+      offset = end
+      yield z
+      continue
+    chunk = stream.read(max(chunk_size,end-len(buffer)))
+    if not chunk:
+      if offset != len(buffer):
+        raise ValueError("Truncated Stream : {} bytes left".format(len(buffer)-offset))
+      return
+    buffer,offset = buffer[offset:] + chunk,0
+
+def map_packed(filename):
+  """ Lazily read packed Z values from a memory mapped file
+  
+  args:
+    filename (str) : path of a file written by write_packed()
+  yield:
+    z (Z)
+  raise:
+    ValueError : file ends in the middle of a value
+  """
+  with open(filename,"rb") as stream:
+    if not stream.seek(0,2):
+      return
+    with mmap.mmap(stream.fileno(),0,access=mmap.ACCESS_READ) as mapped:
+      view,offset = memoryview(mapped),0
+      try:
+        while offset < len(view):
+          z,offset = unpack_from(view,offset)
+          if z is None:
+            raise ValueError("Truncated File : {}".format(filename))
+          yield z
+      finally:
+        view.release()
+
 def task(argv):
   """ Implement Zeckendorf's Arithmetic for addition, subtraction,
   muliplaction, and division.
@@ -65,6 +65,71 @@ class TestZeckendorf(unittest.TestCase):
     a = tasks.zeckendorf.Z("-0z1001")
     logging.info("|{}| = {}".format(a,int(a)))
     self.assertEqual(int(a),-6)
+  def test_cached_value(self):
+    """ Zeckendorf Cached Base10 Value """ 
+    a = tasks.zeckendorf.Z(-1000)
+    logging.info("{} = {}".format(a,int(a)))
+    self.assertEqual(int(a),-1000)
+    self.assertEqual(a,tasks.zeckendorf.Z("-0z100000000100000"))
+    b = a + tasks.zeckendorf.Z(1)
+    self.assertEqual(int(b),-999)
+    self.assertEqual(hash(b),hash(-999))
+    b.value = tasks.zeckendorf.Z("0z1001").value
+    self.assertEqual(int(b),-6)
+  def test_sum(self):
+    """ Zeckendorf Bulk Addition """ 
+    values = [tasks.zeckendorf.Z(n) for n in range(-40,101,3)]
+    a = tasks.zeckendorf.Z.sum(values)
+    b = tasks.zeckendorf.Z("0z0")
+    for value in values:
+      b += value
+    logging.info("sum({}) = {} == {}".format(values,a,b))
+    self.assertEqual(a,b)
+    self.assertEqual(tasks.zeckendorf.Z.sum([]),tasks.zeckendorf.Z("0z0"))
+    self.assertEqual(tasks.zeckendorf.Z.sum(values,start=tasks.zeckendorf.Z(5)),b+tasks.zeckendorf.Z(5))
+    self.assertRaises(TypeError,tasks.zeckendorf.Z.sum,[tasks.zeckendorf.Z(1)],start=5)
+  def test_bytes(self):
+    """ Zeckendorf Packed Binary Round Trip """ 
+    for a in [tasks.zeckendorf.Z("0z0"),tasks.zeckendorf.Z("-0z10100"),tasks.zeckendorf.Z(10**40)]:
+      data = a.to_bytes()
+      logging.info("{} -> {}".format(a,data))
+      self.assertEqual(tasks.zeckendorf.Z.from_bytes(data),a)
+    self.assertEqual(tasks.zeckendorf.Z("-0z10100").to_bytes(),b"\x03\x14")
+    self.assertRaises(ValueError,tasks.zeckendorf.Z.from_bytes,b"\x02\x03")
+    self.assertRaises(ValueError,tasks.zeckendorf.Z.from_bytes,b"\x01")
+    self.assertEqual(tasks.zeckendorf.Z(-0.5).to_bytes(),b"\x00")
+    self.assertRaises(ValueError,tasks.zeckendorf.Z.from_bytes,b"\x04\x01\x00")
+    self.assertRaises(ValueError,tasks.zeckendorf.Z.from_bytes,b"\x80\x00")
+    self.assertRaises(ValueError,tasks.zeckendorf.Z.from_bytes,b"\x82\x00\x01")
+  def test_packed_stream(self):
+    """ Zeckendorf Packed Binary Streams """ 
+    values = [tasks.zeckendorf.Z(n) for n in range(-500,500,7)]
+    values.append(tasks.zeckendorf.Z(7**400))
+    with open("./out/zeckendorf_test.bin","wb") as stream:
+      tasks.zeckendorf.write_packed(stream,values)
+    with open("./out/zeckendorf_test.bin","rb") as stream:
+      read = list(tasks.zeckendorf.read_packed(stream,chunk_size=16))
+    mapped = list(tasks.zeckendorf.map_packed("./out/zeckendorf_test.bin"))
+    logging.info("Read {} values, Mapped {} values".format(len(read),len(mapped)))
+    self.assertListEqual(read,values)
+    self.assertListEqual(mapped,values)
+  def test_fibonacci(self):
+    """ Fibonacci and Lucas Numbers """ 
+    a,b = 0,1
+    for n in range(tasks.zeckendorf.FIBONACCI_LIMIT+10):
+      self.assertEqual(tasks.zeckendorf.fibonacci(n),a)
+      a,b = b,a+b
+    logging.info("F({}) = {}".format(n,tasks.zeckendorf.fibonacci(n)))
+    self.assertEqual(tasks.zeckendorf.fibonacci_pair(n),(tasks.zeckendorf.fibonacci(n),a))
+    self.assertListEqual([tasks.zeckendorf.lucas(n) for n in range(6)],[2,1,3,4,7,11])
+    for function in [tasks.zeckendorf.fibonacci,tasks.zeckendorf.fibonacci_pair,tasks.zeckendorf.lucas]:
+      self.assertRaises(ValueError,function,-1)
+  def test_iter_zeckendorf(self):
+    """ Zeckendorf Consecutive Integers """ 
+    start,stop = tasks.zeckendorf.Z(-20),tasks.zeckendorf.Z(200)
+    values = list(tasks.zeckendorf.iter_zeckendorf(start,stop))
+    logging.info("{} .. {} = {}".format(start,stop,values))
+    self.assertListEqual(values,[tasks.zeckendorf.Z(n) for n in range(-20,200)])
 
 if __name__ == '__main__':
   unittest.main()